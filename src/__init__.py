@@ -2,7 +2,12 @@ from .config import Config, setup_logging
 from .server import OpenTouchServer, QualityController
 from .capture_engine import CaptureEngine
 from .input_handler import InputHandler
-from .network_utils import get_local_ip, get_available_port
+from .network_utils import (
+    get_local_ip,
+    invalidate_local_ip_cache,
+    get_available_port,
+    create_server_socket,
+)
 from .qr_display import generate_qr_terminal, display_connection_info
 
 __all__ = [
@@ -13,7 +18,9 @@ __all__ = [
     "CaptureEngine",
     "InputHandler",
     "get_local_ip",
+    "invalidate_local_ip_cache",
     "get_available_port",
+    "create_server_socket",
     "generate_qr_terminal",
     "display_connection_info",
 ]
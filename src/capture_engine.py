@@ -1,13 +1,55 @@
+import functools
+import os
+import struct
 import threading
 import time
+import zlib
 import cv2
 import numpy as np
-from typing import Optional, Callable
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Optional, Callable, Deque
 import dxcam
 import logging
 
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJPF_BGRA, TJSAMP_420
+
+    _TJ_PIXEL_FORMATS = {3: TJPF_BGR, 4: TJPF_BGRA}
+except ImportError:
+    TurboJPEG = None
+
 from .config import Config
 
+# Each frame message is a little-endian header of full frame width/height and
+# the dirty rect x, y, w, h, followed by the JPEG of that rect.
+FRAME_HEADER = struct.Struct("<6H")
+
+
+def is_keyframe(frame_data: bytes) -> bool:
+    frame_w, frame_h, x, y, w, h = FRAME_HEADER.unpack_from(frame_data)
+    return x == 0 and y == 0 and w == frame_w and h == frame_h
+
+
+@functools.lru_cache(maxsize=1)
+def _query_desktop_size_win32() -> tuple[int, int]:
+    import ctypes
+
+    try:
+        user32 = ctypes.windll.user32
+        user32.SetProcessDPIAware()
+        return user32.GetSystemMetrics(0), user32.GetSystemMetrics(1)
+    except Exception:
+        return 1920, 1080
+
+
+@dataclass(slots=True)
+class CaptureStats:
+    frames_captured: int = 0
+    frames_skipped: int = 0
+    frames_sent: int = 0
+
 
 class CaptureEngine:
     def __init__(self, config: Config):
@@ -15,6 +57,7 @@ class CaptureEngine:
         self.target_fps = config.target_fps
         self.base_jpeg_quality = int(config.jpeg_quality * 100)
         self.current_jpeg_quality = self.base_jpeg_quality
+        self._encode_params = self._build_encode_params()
         self.monitor_idx = config.monitor_idx
         self.camera: Optional[dxcam.DXCamera] = None
         self.running = False
@@ -24,16 +67,29 @@ class CaptureEngine:
         self.desktop_width = 0
         self.desktop_height = 0
         self.logger = logging.getLogger("opentouch.capture")
+        self._tj: Optional["TurboJPEG"] = None
+        self._tj_loaded = False
 
         self.last_frame: Optional[np.ndarray] = None
         self.frame_diff_threshold = 0.02
         self.skip_identical_frames = True
+        self._last_frame_hash: Optional[int] = None
+        self._keyframe_requested = True
+
+        # Both encoders release the GIL, so on multi-core hosts two frames
+        # can be in flight at once. Results are still emitted in order.
+        self.max_pending_encodes = 2
+        self._encode_pool: Optional[ThreadPoolExecutor] = (
+            ThreadPoolExecutor(
+                max_workers=self.max_pending_encodes,
+                thread_name_prefix="opentouch-encode",
+            )
+            if (os.cpu_count() or 1) > 1
+            else None
+        )
+        self._pending_encodes: Deque[Future] = deque()
 
-        self.stats = {
-            "frames_captured": 0,
-            "frames_skipped": 0,
-            "frames_sent": 0,
-        }
+        self.stats = CaptureStats()
 
     def start(self, frame_callback: Callable[[bytes], None]):
         with self.lock:
@@ -42,10 +98,13 @@ class CaptureEngine:
             self.frame_callback = frame_callback
             try:
                 self.camera = dxcam.create(
-                    device_idx=self.monitor_idx, output_idx=0, output_color="BGR"
+                    device_idx=self.monitor_idx, output_idx=0, output_color="BGRA"
                 )
                 self.camera.start(target_fps=self.target_fps)
                 self.running = True
+                self.last_frame = None
+                self._last_frame_hash = None
+                self._keyframe_requested = True
                 self.desktop_width, self.desktop_height = self.get_desktop_size()
                 self.logger.info(
                     f"Capture started on monitor {self.monitor_idx} "
@@ -72,32 +131,43 @@ class CaptureEngine:
             self.logger.info(f"Capture stopped. Stats: {self.stats}")
 
     def get_desktop_size(self) -> tuple[int, int]:
-        import ctypes
+        return _query_desktop_size_win32()
 
-        try:
-            user32 = ctypes.windll.user32
-            user32.SetProcessDPIAware()
-            return user32.GetSystemMetrics(0), user32.GetSystemMetrics(1)
-        except Exception:
-            return 1920, 1080
+    def invalidate_desktop_size(self):
+        _query_desktop_size_win32.cache_clear()
+
+    def _build_encode_params(self) -> list[int]:
+        return [
+            cv2.IMWRITE_JPEG_QUALITY,
+            self.current_jpeg_quality,
+            cv2.IMWRITE_JPEG_SAMPLING_FACTOR,
+            cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420,
+        ]
 
     def set_target_resolution(self, width: int, height: int):
         pass
 
     def set_quality(self, quality: float):
         self.current_jpeg_quality = max(30, min(100, int(quality * 100)))
+        self._encode_params = self._build_encode_params()
         self.logger.debug(f"Quality adjusted to {self.current_jpeg_quality}%")
 
+    def request_keyframe(self):
+        self._keyframe_requested = True
+
     def get_stats(self) -> dict:
-        return self.stats.copy()
+        return asdict(self.stats)
 
     def _capture_loop(self):
         last_frame_time = 0.0
         frame_interval = 1.0 / self.target_fps
         consecutive_identical = 0
+        if not self._tj_loaded:
+            self._tj = self._load_turbojpeg()
 
         while self.running:
             try:
+                self._drain_encodes(self.max_pending_encodes)
                 now = time.time()
                 if now - last_frame_time < frame_interval:
                     time.sleep(0.001)
@@ -108,41 +178,128 @@ class CaptureEngine:
                     continue
 
                 frame = self.camera.get_latest_frame()
-                self.stats["frames_captured"] += 1
+                self.stats.frames_captured += 1
 
                 if frame is not None:
-                    if self.skip_identical_frames and self.last_frame is not None:
-                        if self._frames_identical(frame, self.last_frame):
+                    signature = (
+                        self._frame_signature(frame)
+                        if self.skip_identical_frames
+                        else None
+                    )
+                    keyframe = (
+                        self._keyframe_requested
+                        or self.last_frame is None
+                        or self.last_frame.shape != frame.shape
+                    )
+                    if not keyframe and self.skip_identical_frames:
+                        unchanged = signature == self._last_frame_hash
+                        if unchanged or (
+                            consecutive_identical < 4
+                            and self._frames_identical(frame, self.last_frame)
+                        ):
                             consecutive_identical += 1
-                            self.stats["frames_skipped"] += 1
-                            if consecutive_identical < 5:
-                                time.sleep(0.001)
-                                continue
+                            self.stats.frames_skipped += 1
+                            time.sleep(0.001)
+                            continue
 
                     consecutive_identical = 0
-                    processed = self._process_frame(frame)
-                    if processed and self.frame_callback:
-                        self.frame_callback(processed)
-                        self.stats["frames_sent"] += 1
-                        last_frame_time = now
-                        self.last_frame = frame.copy()
+                    if keyframe:
+                        self._keyframe_requested = False
+                        rect = (0, 0, frame.shape[1], frame.shape[0])
+                    else:
+                        rect = self._dirty_rect(frame, self.last_frame)
+                        if rect is None:
+                            self.stats.frames_skipped += 1
+                            time.sleep(0.001)
+                            continue
+
+                    self.last_frame = frame.copy()
+                    self._last_frame_hash = signature
+                    last_frame_time = now
+                    if self._encode_pool is None:
+                        self._emit(self._encode_rect(self.last_frame, rect))
+                    else:
+                        self._pending_encodes.append(
+                            self._encode_pool.submit(
+                                self._encode_rect, self.last_frame, rect
+                            )
+                        )
+                        self._drain_encodes(self.max_pending_encodes)
                 else:
                     time.sleep(0.001)
             except Exception as e:
                 self.logger.debug(f"Capture loop error: {e}")
                 time.sleep(0.01)
+        self._pending_encodes.clear()
+
+    def _drain_encodes(self, limit: int):
+        pending = self._pending_encodes
+        while pending and (len(pending) > limit or pending[0].done()):
+            self._emit(pending.popleft().result())
+
+    def _emit(self, processed: Optional[bytes]):
+        if processed and self.frame_callback:
+            self.frame_callback(processed)
+            self.stats.frames_sent += 1
+        else:
+            self.request_keyframe()
+
+    def _frame_signature(self, frame: np.ndarray) -> int:
+        if not frame.flags.c_contiguous:
+            frame = np.ascontiguousarray(frame)
+        return zlib.crc32(frame)
+
+    def _dirty_rect(
+        self, frame: np.ndarray, prev: np.ndarray
+    ) -> Optional[tuple[int, int, int, int]]:
+        diff = np.any(frame != prev, axis=2)
+        rows = np.flatnonzero(diff.any(axis=1))
+        if rows.size == 0:
+            return None
+        cols = np.flatnonzero(diff[rows[0] : rows[-1] + 1].any(axis=0))
+        x, y = int(cols[0]), int(rows[0])
+        return x, y, int(cols[-1]) + 1 - x, int(rows[-1]) + 1 - y
+
+    def _encode_rect(
+        self, frame: np.ndarray, rect: tuple[int, int, int, int]
+    ) -> Optional[bytes]:
+        x, y, w, h = rect
+        jpeg = self._process_frame(frame[y : y + h, x : x + w])
+        if jpeg is None:
+            return None
+        return FRAME_HEADER.pack(frame.shape[1], frame.shape[0], x, y, w, h) + jpeg
 
     def _frames_identical(self, frame1: np.ndarray, frame2: np.ndarray) -> bool:
         if frame1.shape != frame2.shape:
             return False
-        diff = np.abs(frame1.astype(np.int16) - frame2.astype(np.int16))
+        diff = np.abs(
+            frame1[..., :3].astype(np.int16) - frame2[..., :3].astype(np.int16)
+        )
         change_ratio = np.mean(diff) / 255.0
         return change_ratio < self.frame_diff_threshold
 
+    def _load_turbojpeg(self) -> Optional["TurboJPEG"]:
+        self._tj_loaded = True
+        if TurboJPEG is None:
+            return None
+        try:
+            return TurboJPEG()
+        except Exception as e:
+            self.logger.warning(f"libjpeg-turbo unavailable, using OpenCV: {e}")
+            return None
+
     def _process_frame(self, frame: np.ndarray) -> Optional[bytes]:
+        if not self._tj_loaded:
+            self._tj = self._load_turbojpeg()
         try:
-            encode_params = [cv2.IMWRITE_JPEG_QUALITY, self.current_jpeg_quality]
-            _, buffer = cv2.imencode(".jpg", frame, encode_params)
+            if self._tj is not None:
+                return self._tj.encode(
+                    frame,
+                    quality=self.current_jpeg_quality,
+                    pixel_format=_TJ_PIXEL_FORMATS[frame.shape[2]],
+                    jpeg_subsample=TJSAMP_420,
+                )
+            _, buffer = cv2.imencode(".jpg", frame, self._encode_params)
             return buffer.tobytes()
         except Exception as e:
             self.logger.debug(f"Frame processing error: {e}")
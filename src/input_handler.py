@@ -4,8 +4,92 @@ from typing import Dict, Any, Optional, Union
 from pynput import mouse, keyboard
 import logging
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _xform(
+    x: float, y: float, client_width: int, client_height: int, width: int, height: int
+) -> tuple[int, int]:
+    pc_x = int((x / client_width) * width)
+    pc_y = int((y / client_height) * height)
+    pc_x = max(0, min(pc_x, width - 1))
+    pc_y = max(0, min(pc_y, height - 1))
+    return pc_x, pc_y
+
+
+if njit is not None:
+    _xform = njit(cache=True, fastmath=True)(_xform)
+
 
 class InputHandler:
+    _SPECIAL_KEYS = {
+        "enter": keyboard.Key.enter,
+        "tab": keyboard.Key.tab,
+        "escape": keyboard.Key.esc,
+        "esc": keyboard.Key.esc,
+        "backspace": keyboard.Key.backspace,
+        "delete": keyboard.Key.delete,
+        "space": keyboard.Key.space,
+        "arrow_up": keyboard.Key.up,
+        "arrow_down": keyboard.Key.down,
+        "arrow_left": keyboard.Key.left,
+        "arrow_right": keyboard.Key.right,
+        "up": keyboard.Key.up,
+        "down": keyboard.Key.down,
+        "left": keyboard.Key.left,
+        "right": keyboard.Key.right,
+        "home": keyboard.Key.home,
+        "end": keyboard.Key.end,
+        "page_up": keyboard.Key.page_up,
+        "page_down": keyboard.Key.page_down,
+        "insert": keyboard.Key.insert,
+        "shift": keyboard.Key.shift,
+        "shift_l": keyboard.Key.shift_l,
+        "shift_r": keyboard.Key.shift_r,
+        "ctrl": keyboard.Key.ctrl,
+        "ctrl_l": keyboard.Key.ctrl_l,
+        "ctrl_r": keyboard.Key.ctrl_r,
+        "alt": keyboard.Key.alt,
+        "alt_l": keyboard.Key.alt_l,
+        "alt_r": keyboard.Key.alt_r,
+        "cmd": keyboard.Key.cmd,
+        "cmd_l": keyboard.Key.cmd_l,
+        "cmd_r": keyboard.Key.cmd_r,
+        "win": keyboard.Key.cmd,
+        "caps_lock": keyboard.Key.caps_lock,
+        "f1": keyboard.Key.f1,
+        "f2": keyboard.Key.f2,
+        "f3": keyboard.Key.f3,
+        "f4": keyboard.Key.f4,
+        "f5": keyboard.Key.f5,
+        "f6": keyboard.Key.f6,
+        "f7": keyboard.Key.f7,
+        "f8": keyboard.Key.f8,
+        "f9": keyboard.Key.f9,
+        "f10": keyboard.Key.f10,
+        "f11": keyboard.Key.f11,
+        "f12": keyboard.Key.f12,
+        "return": keyboard.Key.enter,
+        "control": keyboard.Key.ctrl,
+        "meta": keyboard.Key.cmd,
+        "arrowup": keyboard.Key.up,
+        "arrowdown": keyboard.Key.down,
+        "arrowleft": keyboard.Key.left,
+        "arrowright": keyboard.Key.right,
+        "pageup": keyboard.Key.page_up,
+        "pagedown": keyboard.Key.page_down,
+        "capslock": keyboard.Key.caps_lock,
+    }
+
+    _BUTTONS = {
+        "left": mouse.Button.left,
+        "right": mouse.Button.right,
+        "middle": mouse.Button.middle,
+    }
+
     def __init__(self):
         self.mouse_controller = mouse.Controller()
         self.keyboard_controller = keyboard.Controller()
@@ -22,6 +106,9 @@ class InputHandler:
         self.key_state: Dict[str, bool] = {}
         self.logger = logging.getLogger("opentouch.input")
 
+    def warm_up(self):
+        _xform(0.0, 0.0, 1, 1, 1, 1)
+
     def set_desktop_size(self, width: int, height: int):
         with self.lock:
             self.desktop_width = width
@@ -62,11 +149,16 @@ class InputHandler:
         self, x: float, y: float, client_width: int, client_height: int
     ) -> tuple[int, int]:
         with self.lock:
-            pc_x = int((x / client_width) * self.desktop_width)
-            pc_y = int((y / client_height) * self.desktop_height)
-            pc_x = max(0, min(pc_x, self.desktop_width - 1))
-            pc_y = max(0, min(pc_y, self.desktop_height - 1))
-            return pc_x, pc_y
+            # Pin one argument signature so numba never compiles mid-session
+            # when the client sends an int for one axis and a float for the other.
+            return _xform(
+                float(x),
+                float(y),
+                int(client_width),
+                int(client_height),
+                int(self.desktop_width),
+                int(self.desktop_height),
+            )
 
     def _handle_move(
         self, event: Dict[str, Any], client_width: int, client_height: int
@@ -141,58 +233,9 @@ class InputHandler:
             self.logger.debug(f"KeyPress error for '{key}': {e}")
 
     def _parse_key(self, key: str) -> Optional[Union[keyboard.Key, keyboard.KeyCode]]:
-        special_keys = {
-            "enter": keyboard.Key.enter,
-            "tab": keyboard.Key.tab,
-            "escape": keyboard.Key.esc,
-            "esc": keyboard.Key.esc,
-            "backspace": keyboard.Key.backspace,
-            "delete": keyboard.Key.delete,
-            "space": keyboard.Key.space,
-            "arrow_up": keyboard.Key.up,
-            "arrow_down": keyboard.Key.down,
-            "arrow_left": keyboard.Key.left,
-            "arrow_right": keyboard.Key.right,
-            "up": keyboard.Key.up,
-            "down": keyboard.Key.down,
-            "left": keyboard.Key.left,
-            "right": keyboard.Key.right,
-            "home": keyboard.Key.home,
-            "end": keyboard.Key.end,
-            "page_up": keyboard.Key.page_up,
-            "page_down": keyboard.Key.page_down,
-            "insert": keyboard.Key.insert,
-            "shift": keyboard.Key.shift,
-            "shift_l": keyboard.Key.shift_l,
-            "shift_r": keyboard.Key.shift_r,
-            "ctrl": keyboard.Key.ctrl,
-            "ctrl_l": keyboard.Key.ctrl_l,
-            "ctrl_r": keyboard.Key.ctrl_r,
-            "alt": keyboard.Key.alt,
-            "alt_l": keyboard.Key.alt_l,
-            "alt_r": keyboard.Key.alt_r,
-            "cmd": keyboard.Key.cmd,
-            "cmd_l": keyboard.Key.cmd_l,
-            "cmd_r": keyboard.Key.cmd_r,
-            "win": keyboard.Key.cmd,
-            "caps_lock": keyboard.Key.caps_lock,
-            "f1": keyboard.Key.f1,
-            "f2": keyboard.Key.f2,
-            "f3": keyboard.Key.f3,
-            "f4": keyboard.Key.f4,
-            "f5": keyboard.Key.f5,
-            "f6": keyboard.Key.f6,
-            "f7": keyboard.Key.f7,
-            "f8": keyboard.Key.f8,
-            "f9": keyboard.Key.f9,
-            "f10": keyboard.Key.f10,
-            "f11": keyboard.Key.f11,
-            "f12": keyboard.Key.f12,
-        }
-
-        key_lower = key.lower().replace(" ", "_")
-        if key_lower in special_keys:
-            return special_keys[key_lower]
+        special = self._SPECIAL_KEYS.get(key.lower().replace(" ", "_"))
+        if special is not None:
+            return special
 
         if len(key) == 1:
             return keyboard.KeyCode.from_char(key)
@@ -200,12 +243,7 @@ class InputHandler:
         return None
 
     def _get_button(self, name: str) -> mouse.Button:
-        buttons = {
-            "left": mouse.Button.left,
-            "right": mouse.Button.right,
-            "middle": mouse.Button.middle,
-        }
-        return buttons.get(name, mouse.Button.left)
+        return self._BUTTONS.get(name, mouse.Button.left)
 
     def release_all(self):
         for button_name in self.button_state:
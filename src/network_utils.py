@@ -1,8 +1,10 @@
+import functools
 import socket
 import subprocess
 import platform
 
 
+@functools.lru_cache(maxsize=1)
 def get_local_ip() -> str:
     try:
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -40,12 +42,31 @@ def get_local_ip() -> str:
     return "127.0.0.1"
 
 
+def invalidate_local_ip_cache():
+    get_local_ip.cache_clear()
+
+
 def get_available_port(start_port: int = 8000, max_attempts: int = 100) -> int:
-    for port in range(start_port, start_port + max_attempts):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        if platform.system() != "Windows":
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.bind(("", port))
-                return port
+            s.bind(("", start_port))
         except OSError:
-            continue
-    return start_port
+            s.bind(("", 0))
+        return s.getsockname()[1]
+
+
+def create_server_socket(
+    host: str, port: int, send_buffer_size: int = 4 << 20
+) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    if platform.system() != "Windows":
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, send_buffer_size)
+    except OSError:
+        pass
+    sock.bind((host, port))
+    return sock
@@ -1,3 +1,4 @@
+import functools
 import os
 import qrcode
 from qrcode.constants import ERROR_CORRECT_L
@@ -8,6 +9,11 @@ def generate_qr_terminal(url: str, clear_screen: bool = True) -> str:
     if clear_screen:
         os.system("cls" if os.name == "nt" else "clear")
 
+    return _render_qr_terminal(url)
+
+
+@functools.lru_cache(maxsize=16)
+def _render_qr_terminal(url: str) -> str:
     qr = qrcode.QRCode(
         version=1,
         error_correction=ERROR_CORRECT_L,
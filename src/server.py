@@ -1,26 +1,89 @@
 import asyncio
+import gzip
+import hashlib
 import json
 import time
-from typing import Dict, Optional, Any, List
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+import uuid
+from collections import deque
+from pathlib import Path
+from urllib.parse import parse_qs
+from typing import Dict, Optional, Any, Deque, List, Set
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
+import orjson
 import socketio
 import logging
 
-from .capture_engine import CaptureEngine
+from .capture_engine import CaptureEngine, is_keyframe
 from .input_handler import InputHandler
 from .qr_display import display_connection_info
-from .network_utils import get_local_ip, get_available_port
+from .network_utils import get_local_ip, get_available_port, create_server_socket
 from .config import Config
 
+_STATIC_DIR = Path(__file__).parent / "static"
+
+
+def _fingerprint(name: str) -> str:
+    digest = hashlib.sha1((_STATIC_DIR / name).read_bytes()).hexdigest()[:12]
+    return f"/static/{name}?v={digest}"
+
+
+_INDEX_HTML = (
+    (_STATIC_DIR / "index.html")
+    .read_text(encoding="utf-8")
+    .replace("/static/app.css", _fingerprint("app.css"))
+    .replace("/static/app.js", _fingerprint("app.js"))
+)
+_INDEX_BYTES = _INDEX_HTML.encode("utf-8")
+_INDEX_GZ = gzip.compress(_INDEX_BYTES, 9)
+_INDEX_DIGEST = hashlib.sha1(_INDEX_BYTES).hexdigest()[:16]
+_INDEX_ETAG = f'"{_INDEX_DIGEST}"'
+_INDEX_GZ_ETAG = f'"{_INDEX_DIGEST}-gz"'
+
+_HEALTH_BASE = {"status": "healthy"}
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class CachedStaticFiles(StaticFiles):
+    async def get_response(self, path, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code == 200:
+            if "v" in parse_qs(scope.get("query_string", b"").decode("latin-1")):
+                cache_control = "public, max-age=31536000, immutable"
+            else:
+                cache_control = "public, max-age=300"
+            response.headers["Cache-Control"] = cache_control
+        return response
+
 
 class QualityController:
+    __slots__ = (
+        "base_quality",
+        "current_quality",
+        "max_samples",
+        "latency_samples",
+        "_running_sum",
+        "min_quality",
+        "max_quality",
+        "low_latency_threshold",
+        "high_latency_threshold",
+        "logger",
+    )
+
     def __init__(self, base_quality: float):
         self.base_quality = base_quality
         self.current_quality = base_quality
-        self.latency_samples: List[float] = []
         self.max_samples = 10
+        self.latency_samples: Deque[float] = deque(maxlen=self.max_samples)
+        self._running_sum = 0.0
         self.min_quality = 0.4
         self.max_quality = 1.0
         self.low_latency_threshold = 50
@@ -28,16 +91,17 @@ class QualityController:
         self.logger = logging.getLogger("opentouch.quality")
 
     def record_latency(self, latency_ms: float):
+        if len(self.latency_samples) == self.max_samples:
+            self._running_sum -= self.latency_samples[0]
         self.latency_samples.append(latency_ms)
-        if len(self.latency_samples) > self.max_samples:
-            self.latency_samples.pop(0)
+        self._running_sum += latency_ms
         self._adjust_quality()
 
     def _adjust_quality(self):
         if len(self.latency_samples) < 3:
             return
 
-        avg_latency = sum(self.latency_samples) / len(self.latency_samples)
+        avg_latency = self._running_sum / len(self.latency_samples)
 
         if avg_latency < self.low_latency_threshold:
             target = min(self.base_quality + 0.1, self.max_quality)
@@ -48,17 +112,21 @@ class QualityController:
 
         if abs(target - self.current_quality) > 0.05:
             self.current_quality = target
-            self.logger.debug(
-                f"Quality adjusted to {self.current_quality:.2f} (latency: {avg_latency:.0f}ms)"
-            )
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(
+                    "Quality adjusted to %.2f (latency: %.0fms)",
+                    self.current_quality,
+                    avg_latency,
+                )
 
     def get_quality(self) -> float:
         return self.current_quality
 
+    def is_settled(self) -> bool:
+        return len(self.latency_samples) >= self.max_samples // 2
+
     def get_avg_latency(self) -> float:
-        if not self.latency_samples:
-            return 0
-        return sum(self.latency_samples) / len(self.latency_samples)
+        return self._running_sum / (len(self.latency_samples) or 1)
 
 
 class OpenTouchServer:
@@ -67,7 +135,9 @@ class OpenTouchServer:
         self.port = config.port
         self.app = FastAPI(title="OpenTouch-Remote")
         self.sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*")
-        self.socket_app = socketio.ASGIApp(self.sio, self.app)
+        self.socket_app = socketio.ASGIApp(
+            self.sio, self.app, on_startup=self._on_startup
+        )
 
         self.capture_engine = CaptureEngine(config)
         self.input_handler = InputHandler()
@@ -75,92 +145,147 @@ class OpenTouchServer:
 
         self.connected_clients: Dict[str, Dict[str, Any]] = {}
         self.client_resolutions: Dict[str, tuple] = {}
+        self.client_queues: Dict[str, asyncio.Queue] = {}
+        self._awaiting_keyframe: Set[str] = set()
+        self._last_keyframe_request = 0.0
+        self.keyframe_min_interval = 0.5
+        self._keyframe_retry: Optional[asyncio.TimerHandle] = None
         self.loop: Optional[asyncio.AbstractEventLoop] = None
-        self.is_broadcasting = False
         self.logger = logging.getLogger("opentouch.server")
 
-        self.latency_tracker: Dict[str, Dict[str, float]] = {}
+        self.latency_tracker: Dict[str, int] = {}
+        self._pending_latency: Dict[str, tuple] = {}
+        self._applied_quality = config.jpeg_quality
+        self._last_quality_apply = 0.0
+        self.quality_apply_interval = 2.0
+        self._desktop_size_list: Optional[List[int]] = None
+        self._connected_payload_cache: Optional[Dict[str, Any]] = None
+        self._latency_task: Optional[asyncio.Task] = None
+        self._ping_task: Optional[asyncio.Task] = None
+        self.ping_interval = 1.0
 
         self._setup_routes()
         self._setup_socket_events()
 
     def _setup_routes(self):
+        self.app.mount(
+            "/static", CachedStaticFiles(directory=_STATIC_DIR), name="static"
+        )
+
         @self.app.get("/", response_class=HTMLResponse)
-        async def index():
-            return self._get_html_page()
+        async def index(request: Request):
+            gzipped = "gzip" in request.headers.get("accept-encoding", "")
+            headers = {
+                "ETag": _INDEX_GZ_ETAG if gzipped else _INDEX_ETAG,
+                "Vary": "Accept-Encoding",
+                "Cache-Control": "public, max-age=3600",
+            }
+            if_none_match = request.headers.get("if-none-match", "")
+            if _etag_matches(if_none_match, headers["ETag"]):
+                return Response(status_code=304, headers=headers)
+
+            if gzipped:
+                headers["Content-Encoding"] = "gzip"
+                return Response(
+                    _INDEX_GZ,
+                    media_type="text/html; charset=utf-8",
+                    headers=headers,
+                )
+            return Response(
+                _INDEX_BYTES, media_type="text/html; charset=utf-8", headers=headers
+            )
+
+        @self.app.websocket("/ws/frame")
+        async def frame_ws(websocket: WebSocket):
+            await websocket.accept()
+            frame_id = uuid.uuid4().hex
+            queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+            self.client_queues[frame_id] = queue
+            self._awaiting_keyframe.add(frame_id)
+            self._request_keyframe()
+            sender = asyncio.create_task(self._frame_sender(websocket, queue))
+            try:
+                while True:
+                    message = await websocket.receive()
+                    if message["type"] == "websocket.disconnect":
+                        break
+            except WebSocketDisconnect:
+                pass
+            finally:
+                sender.cancel()
+                self.client_queues.pop(frame_id, None)
+                self._awaiting_keyframe.discard(frame_id)
 
         @self.app.get("/health")
         async def health():
-            return {
-                "status": "healthy",
-                "clients": len(self.connected_clients),
-                "quality": self.quality_controller.get_quality(),
-                "stats": self.capture_engine.get_stats(),
-            }
+            return Response(
+                orjson.dumps(
+                    {
+                        **_HEALTH_BASE,
+                        "clients": len(self.connected_clients),
+                        "quality": self.quality_controller.get_quality(),
+                        "stats": self.capture_engine.get_stats(),
+                    }
+                ),
+                media_type="application/json",
+            )
 
         @self.app.get("/stats")
         async def stats():
-            return {
-                "connected_clients": len(self.connected_clients),
-                "quality": {
-                    "current": self.quality_controller.get_quality(),
-                    "base": self.quality_controller.base_quality,
-                    "avg_latency_ms": self.quality_controller.get_avg_latency(),
-                },
-                "capture": self.capture_engine.get_stats(),
-            }
+            return Response(
+                orjson.dumps(
+                    {
+                        "connected_clients": len(self.connected_clients),
+                        "quality": {
+                            "current": self.quality_controller.get_quality(),
+                            "base": self.quality_controller.base_quality,
+                            "avg_latency_ms": self.quality_controller.get_avg_latency(),
+                        },
+                        "capture": self.capture_engine.get_stats(),
+                    }
+                ),
+                media_type="application/json",
+            )
 
     def _setup_socket_events(self):
         @self.sio.event
         async def connect(sid, environ, auth=None):
-            if self.loop is None or self.loop.is_closed():
-                self.loop = asyncio.get_running_loop()
-
             self.connected_clients[sid] = {"connected_at": time.time()}
-            self.latency_tracker[sid] = {
-                "last_ping": time.time(),
-                "last_pong": time.time(),
-            }
             self.logger.info(f"Client connected: {sid}")
 
+            if self._latency_task is None:
+                self._latency_task = asyncio.create_task(self._latency_flush())
+            if self._ping_task is None:
+                self._ping_task = asyncio.create_task(self._ping_loop())
+
             if len(self.connected_clients) == 1:
-                desktop_size = self.capture_engine.get_desktop_size()
-                self.input_handler.set_desktop_size(desktop_size[0], desktop_size[1])
-
-                def frame_callback(frame_data: bytes):
-                    if self.is_broadcasting:
-                        return
-
-                    if self.loop is not None:
-                        asyncio.run_coroutine_threadsafe(
-                            self._broadcast_frame(frame_data), self.loop
-                        )
-
-                self.capture_engine.start(frame_callback)
-
-            await self.sio.emit(
-                "connected",
-                {
-                    "desktop_size": list(self.capture_engine.get_desktop_size()),
-                    "quality": self.quality_controller.get_quality(),
-                },
-                to=sid,
-            )
+                # The resolution may have changed while nobody was connected.
+                self.capture_engine.invalidate_desktop_size()
+                self._refresh_desktop_size()
+                self.input_handler.set_desktop_size(*self._desktop_size_list)
+                self.capture_engine.start(self._on_frame)
+
+            await self.sio.emit("connected", self._get_connected_payload(), to=sid)
 
         @self.sio.event
         async def disconnect(sid):
             self.logger.info(f"Client disconnected: {sid}")
 
-            if sid in self.connected_clients:
-                del self.connected_clients[sid]
-            if sid in self.client_resolutions:
-                del self.client_resolutions[sid]
-            if sid in self.latency_tracker:
-                del self.latency_tracker[sid]
+            self.connected_clients.pop(sid, None)
+            self.client_resolutions.pop(sid, None)
+            self.latency_tracker.pop(sid, None)
+
+            self._pending_latency.pop(sid, None)
 
             if not self.connected_clients:
                 self.capture_engine.stop()
                 self.input_handler.release_all()
+                if self._latency_task is not None:
+                    self._latency_task.cancel()
+                    self._latency_task = None
+                if self._ping_task is not None:
+                    self._ping_task.cancel()
+                    self._ping_task = None
 
         @self.sio.event
         async def viewport(sid, data):
@@ -171,10 +296,11 @@ class OpenTouchServer:
 
         @self.sio.event
         async def input(sid, data):
-            if sid not in self.client_resolutions:
+            resolution = self.client_resolutions.get(sid)
+            if resolution is None:
                 return
 
-            client_w, client_h = self.client_resolutions[sid]
+            client_w, client_h = resolution
 
             try:
                 self.input_handler.process_event(data, client_w, client_h)
@@ -182,591 +308,137 @@ class OpenTouchServer:
                 self.logger.error(f"Input error: {e}")
 
         @self.sio.event
-        async def pong(sid, data):
-            if sid in self.latency_tracker:
-                now = time.time()
-                latency_ms = (now - self.latency_tracker[sid]["last_ping"]) * 1000
-                self.latency_tracker[sid]["last_pong"] = now
-
-                self.quality_controller.record_latency(latency_ms)
-                current_quality = self.quality_controller.get_quality()
-
-                if (
-                    abs(
-                        current_quality - self.capture_engine.current_jpeg_quality / 100
-                    )
-                    > 0.05
-                ):
-                    self.capture_engine.set_quality(current_quality)
+        async def pong(sid, data=None):
+            sent = self.latency_tracker.pop(sid, None)
+            if sent is None:
+                return
+            latency_ms = (time.monotonic_ns() - sent) / 1_000_000
 
-                await self.sio.emit(
-                    "latency",
-                    {
-                        "ms": round(latency_ms, 1),
-                        "quality": current_quality,
-                    },
-                    to=sid,
-                )
+            self.quality_controller.record_latency(latency_ms)
+            current_quality = self.quality_controller.get_quality()
 
-    async def _broadcast_frame(self, frame_data: bytes):
-        if self.connected_clients:
-            self.is_broadcasting = True
-            try:
-                await self.sio.emit("frame", frame_data)
-            except Exception as e:
-                self.logger.error(f"Broadcast error: {e}")
-            finally:
-                self.is_broadcasting = False
+            self._apply_quality(current_quality)
 
-    def _get_html_page(self) -> str:
-        return """<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=1.0, user-scalable=no, viewport-fit=cover">
-    <title>OpenTouch Remote</title>
-    <link rel="preconnect" href="https://fonts.googleapis.com">
-    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-    <link href="https://fonts.googleapis.com/css2?family=Outfit:wght@300;400;600&family=JetBrains+Mono&display=swap" rel="stylesheet">
-    <style>
-        :root {
-            --bg: #0a0a0c;
-            --accent: #3b82f6;
-            --accent-glow: rgba(59, 130, 246, 0.4);
-            --text: #f8fafc;
-            --glass: rgba(255, 255, 255, 0.05);
-            --glass-border: rgba(255, 255, 255, 0.1);
-            --quality-excellent: #22c55e;
-            --quality-good: #84cc16;
-            --quality-fair: #eab308;
-            --quality-poor: #ef4444;
-        }
-
-        * { margin: 0; padding: 0; box-sizing: border-box; -webkit-tap-highlight-color: transparent; }
-        
-        body { 
-            width: 100vw; height: 100vh; 
-            overflow: hidden; 
-            background: var(--bg); 
-            color: var(--text);
-            font-family: 'Outfit', sans-serif;
-            touch-action: none;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }
-
-        #container {
-            position: relative;
-            width: 100%;
-            height: 100%;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            background: radial-gradient(circle at center, #1e293b 0%, #0a0a0c 100%);
-        }
-
-        #canvas {
-            box-shadow: 0 20px 50px rgba(0,0,0,0.5);
-            background: #000;
-            max-width: 100%;
-            max-height: 100%;
-            transition: opacity 0.3s ease;
-        }
-
-        .overlay {
-            position: fixed;
-            top: 20px;
-            left: 50%;
-            transform: translateX(-50%);
-            padding: 8px 16px;
-            background: var(--glass);
-            backdrop-filter: blur(12px);
-            border: 1px solid var(--glass-border);
-            border-radius: 100px;
-            display: flex;
-            align-items: center;
-            gap: 12px;
-            z-index: 100;
-            pointer-events: none;
-            opacity: 0;
-            animation: fadeIn 0.5s ease forwards 0.5s;
-        }
-
-        .status-dot {
-            width: 8px;
-            height: 8px;
-            background: #22c55e;
-            border-radius: 50%;
-            box-shadow: 0 0 10px #22c55e;
-        }
-
-        .status-text {
-            font-size: 13px;
-            font-weight: 500;
-            letter-spacing: 0.02em;
-        }
-
-        #fps-counter {
-            font-family: 'JetBrains Mono', monospace;
-            font-size: 11px;
-            color: #94a3b8;
-        }
-
-        #latency-indicator {
-            font-family: 'JetBrains Mono', monospace;
-            font-size: 11px;
-            padding: 2px 6px;
-            border-radius: 4px;
-            background: rgba(34, 197, 94, 0.2);
-            color: var(--quality-excellent);
-        }
-
-        .controls {
-            position: fixed;
-            bottom: 30px;
-            right: 30px;
-            display: flex;
-            flex-direction: column;
-            gap: 12px;
-            z-index: 100;
-        }
-
-        .btn {
-            width: 50px;
-            height: 50px;
-            border-radius: 16px;
-            background: var(--glass);
-            backdrop-filter: blur(12px);
-            border: 1px solid var(--glass-border);
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            color: white;
-            transition: all 0.2s ease;
-            pointer-events: auto;
-        }
-
-        .btn:active {
-            transform: scale(0.9);
-            background: var(--accent);
-            border-color: var(--accent);
-        }
-
-        .btn-secondary {
-            width: 44px;
-            height: 44px;
-            border-radius: 12px;
-        }
-
-        @keyframes fadeIn {
-            from { opacity: 0; transform: translate(-50%, -10px); }
-            to { opacity: 1; transform: translate(-50%, 0); }
-        }
-
-        #gesture-hint {
-            position: fixed;
-            bottom: 30px;
-            left: 50%;
-            transform: translateX(-50%);
-            font-size: 12px;
-            color: #64748b;
-            text-align: center;
-            padding: 8px 20px;
-            background: rgba(0,0,0,0.3);
-            border-radius: 20px;
-            pointer-events: none;
-        }
-
-        .keyboard-bar {
-            position: fixed;
-            bottom: 100px;
-            left: 50%;
-            transform: translateX(-50%);
-            display: flex;
-            gap: 8px;
-            flex-wrap: wrap;
-            justify-content: center;
-            max-width: 90vw;
-            z-index: 100;
-            opacity: 0;
-            transition: opacity 0.3s ease;
-            pointer-events: none;
-        }
-
-        .keyboard-bar.visible {
-            opacity: 1;
-            pointer-events: auto;
-        }
-
-        .key-btn {
-            min-width: 44px;
-            height: 36px;
-            padding: 0 12px;
-            border-radius: 8px;
-            background: var(--glass);
-            backdrop-filter: blur(12px);
-            border: 1px solid var(--glass-border);
-            color: white;
-            font-family: 'JetBrains Mono', monospace;
-            font-size: 12px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            transition: all 0.15s ease;
-        }
-
-        .key-btn:active {
-            background: var(--accent);
-            border-color: var(--accent);
-            transform: scale(0.95);
-        }
-
-        .quality-bar {
-            position: fixed;
-            top: 60px;
-            left: 50%;
-            transform: translateX(-50%);
-            width: 150px;
-            height: 4px;
-            background: rgba(255,255,255,0.1);
-            border-radius: 2px;
-            overflow: hidden;
-            opacity: 0;
-            transition: opacity 0.3s ease;
-        }
-
-        .quality-bar.visible {
-            opacity: 1;
-        }
-
-        .quality-fill {
-            height: 100%;
-            background: var(--quality-excellent);
-            transition: width 0.3s ease, background 0.3s ease;
-        }
-    </style>
-</head>
-<body>
-    <div id="container">
-        <canvas id="canvas"></canvas>
-    </div>
-
-    <div class="overlay">
-        <div class="status-dot" id="dot"></div>
-        <div class="status-text" id="status">Connecting...</div>
-        <div id="fps-counter">0 FPS</div>
-        <div id="latency-indicator">0ms</div>
-    </div>
-
-    <div class="quality-bar" id="quality-bar">
-        <div class="quality-fill" id="quality-fill"></div>
-    </div>
-
-    <div id="gesture-hint">
-        Tap: Click | Hold: Right Click | 2 Fingers: Scroll
-    </div>
-
-    <div class="controls">
-        <div class="btn" id="btn-fullscreen" title="Fullscreen">
-            <svg width="20" height="20" fill="none" stroke="currentColor" stroke-width="2" viewBox="0 0 24 24"><path d="M15 3h6v6M9 21H3v-6M21 3l-7 7M3 21l7-7"/></svg>
-        </div>
-        <div class="btn btn-secondary" id="btn-keyboard" title="Keyboard">
-            <svg width="18" height="18" fill="none" stroke="currentColor" stroke-width="2" viewBox="0 0 24 24"><rect x="2" y="6" width="20" height="12" rx="2"/><path d="M6 10h.01M10 10h.01M14 10h.01M18 10h.01M8 14h8"/></svg>
-        </div>
-        <div class="btn btn-secondary" id="btn-reset" title="Reset">
-            <svg width="18" height="18" fill="none" stroke="currentColor" stroke-width="2" viewBox="0 0 24 24"><path d="M4 4v5h.582m15.356 2A8.001 8.001 0 004.582 9m0 0H9m11 11v-5h-.581m0 0a8.003 8.003 0 01-15.357-2m15.357 2H15"/></svg>
-        </div>
-    </div>
-
-    <div class="keyboard-bar" id="keyboard-bar">
-        <div class="key-btn" data-key="Escape">ESC</div>
-        <div class="key-btn" data-key="Tab">TAB</div>
-        <div class="key-btn" data-key="Enter">ENTER</div>
-        <div class="key-btn" data-key="Backspace">DEL</div>
-        <div class="key-btn" data-key="Arrow_Up">UP</div>
-        <div class="key-btn" data-key="Arrow_Down">DOWN</div>
-        <div class="key-btn" data-key="Arrow_Left">LEFT</div>
-        <div class="key-btn" data-key="Arrow_Right">RIGHT</div>
-        <div class="key-btn" data-key=" ">SPACE</div>
-        <div class="key-btn" data-key="Control">CTRL</div>
-        <div class="key-btn" data-key="Alt">ALT</div>
-        <div class="key-btn" data-key="Shift">SHIFT</div>
-    </div>
-    
-    <script src="https://cdn.socket.io/4.5.4/socket.io.min.js"></script>
-    <script>
-        const canvas = document.getElementById('canvas');
-        const ctx = canvas.getContext('2d');
-        const status = document.getElementById('status');
-        const dot = document.getElementById('dot');
-        const fpsCounter = document.getElementById('fps-counter');
-        const latencyIndicator = document.getElementById('latency-indicator');
-        const qualityBar = document.getElementById('quality-bar');
-        const qualityFill = document.getElementById('quality-fill');
-        const keyboardBar = document.getElementById('keyboard-bar');
-        
-        let socket = null;
-        let desktopWidth = 1920;
-        let desktopHeight = 1080;
-        let frameCount = 0;
-        let lastFpsUpdate = Date.now();
-        let currentQuality = 0.85;
-        
-        let touchStartPos = null;
-        let touchStartTime = 0;
-        let isDragging = false;
-        let longPressTimer = null;
-        let isRightClick = false;
-        
-        let lastTwoFingerDist = null;
-        let lastTwoFingerCenter = null;
-
-        let activeKeys = new Set();
-
-        function connect() {
-            socket = io(window.location.origin, {
-                transports: ['websocket']
-            });
-            
-            socket.on('connect', () => {
-                status.textContent = 'Connected';
-                dot.style.background = '#22c55e';
-                dot.style.boxShadow = '0 0 10px #22c55e';
-                qualityBar.classList.add('visible');
-                reportViewport();
-                startPing();
-            });
-            
-            socket.on('connected', (data) => {
-                desktopWidth = data.desktop_size[0];
-                desktopHeight = data.desktop_size[1];
-                currentQuality = data.quality || 0.85;
-                updateQualityDisplay();
-            });
-            
-            socket.on('frame', (data) => {
-                const blob = new Blob([data], { type: 'image/jpeg' });
-                const url = URL.createObjectURL(blob);
-                const img = new Image();
-                img.onload = () => {
-                    if (canvas.width !== img.width || canvas.height !== img.height) {
-                        canvas.width = img.width;
-                        canvas.height = img.height;
-                        reportViewport();
-                    }
-                    ctx.drawImage(img, 0, 0);
-                    URL.revokeObjectURL(url);
-                    frameCount++;
-                    updateFps();
-                };
-                img.src = url;
-            });
-            
-            socket.on('latency', (data) => {
-                latencyIndicator.textContent = `${data.ms}ms`;
-                currentQuality = data.quality;
-                updateQualityDisplay();
-            });
-            
-            socket.on('disconnect', () => {
-                status.textContent = 'Disconnected';
-                dot.style.background = '#ef4444';
-                dot.style.boxShadow = '0 0 10px #ef4444';
-                qualityBar.classList.remove('visible');
-            });
-        }
-
-        function startPing() {
-            setInterval(() => {
-                if (socket && socket.connected) {
-                    socket.emit('pong', { ts: Date.now() });
-                }
-            }, 1000);
-        }
-
-        function updateQualityDisplay() {
-            const percentage = currentQuality * 100;
-            qualityFill.style.width = `${percentage}%`;
-            
-            let color = '#22c55e';
-            if (currentQuality < 0.5) color = '#ef4444';
-            else if (currentQuality < 0.7) color = '#eab308';
-            else if (currentQuality < 0.85) color = '#84cc16';
-            
-            qualityFill.style.background = color;
-            latencyIndicator.style.background = `${color}33`;
-            latencyIndicator.style.color = color;
-        }
-
-        function updateFps() {
-            const now = Date.now();
-            if (now - lastFpsUpdate >= 1000) {
-                fpsCounter.textContent = `${frameCount} FPS`;
-                frameCount = 0;
-                lastFpsUpdate = now;
-            }
-        }
-
-        function reportViewport() {
-            if (socket && socket.connected) {
-                const dpr = window.devicePixelRatio || 1;
-                socket.emit('viewport', {
-                    width: Math.floor(window.innerWidth * dpr),
-                    height: Math.floor(window.innerHeight * dpr),
-                    viewWidth: window.innerWidth,
-                    viewHeight: window.innerHeight
-                });
-            }
-        }
-
-        function getTouchPos(e) {
-            const rect = canvas.getBoundingClientRect();
-            const touch = e.touches[0] || e.changedTouches[0];
-            const x = (touch.clientX - rect.left) * (canvas.width / rect.width);
-            const y = (touch.clientY - rect.top) * (canvas.height / rect.height);
-            return { x, y };
-        }
-
-        function sendInput(type, data) {
-            if (socket && socket.connected) {
-                socket.emit('input', { type, ...data });
-            }
-        }
-
-        canvas.addEventListener('touchstart', (e) => {
-            e.preventDefault();
-            if (e.touches.length === 1) {
-                const pos = getTouchPos(e);
-                touchStartPos = pos;
-                touchStartTime = Date.now();
-                isDragging = false;
-                isRightClick = false;
-
-                longPressTimer = setTimeout(() => {
-                    isRightClick = true;
-                    if (window.navigator.vibrate) window.navigator.vibrate(50);
-                }, 600);
-            } else if (e.touches.length === 2) {
-                const t1 = e.touches[0];
-                const t2 = e.touches[1];
-                lastTwoFingerCenter = {
-                    x: (t1.clientX + t2.clientX) / 2,
-                    y: (t1.clientY + t2.clientY) / 2
-                };
-            }
-        }, { passive: false });
-
-        canvas.addEventListener('touchmove', (e) => {
-            e.preventDefault();
-            if (e.touches.length === 1) {
-                const pos = getTouchPos(e);
-                const dist = Math.sqrt(Math.pow(pos.x - touchStartPos.x, 2) + Math.pow(pos.y - touchStartPos.y, 2));
-                
-                if (dist > 5) {
-                    if (longPressTimer) clearTimeout(longPressTimer);
-                    if (!isDragging) {
-                        sendInput('mousedown', { button: 'left' });
-                        isDragging = true;
-                    }
-                    sendInput('move', { x: pos.x, y: pos.y });
-                }
-            } else if (e.touches.length === 2) {
-                const t1 = e.touches[0];
-                const t2 = e.touches[1];
-                const center = {
-                    x: (t1.clientX + t2.clientX) / 2,
-                    y: (t1.clientY + t2.clientY) / 2
-                };
-                
-                const dy = center.y - lastTwoFingerCenter.y;
-                const dx = center.x - lastTwoFingerCenter.x;
-                
-                if (Math.abs(dy) > 2 || Math.abs(dx) > 2) {
-                    sendInput('scroll', { dx: -dx, dy: dy });
-                    lastTwoFingerCenter = center;
-                }
-            }
-        }, { passive: false });
-
-        canvas.addEventListener('touchend', (e) => {
-            e.preventDefault();
-            if (longPressTimer) clearTimeout(longPressTimer);
-
-            if (e.touches.length === 0) {
-                if (isRightClick) {
-                    const pos = getTouchPos(e);
-                    sendInput('move', { x: pos.x, y: pos.y });
-                    sendInput('click', { button: 'right' });
-                } else if (!isDragging) {
-                    const pos = getTouchPos(e);
-                    sendInput('move', { x: pos.x, y: pos.y });
-                    sendInput('click', { button: 'left' });
-                } else {
-                    sendInput('mouseup', { button: 'left' });
-                }
-                isDragging = false;
-            }
-        }, { passive: false });
+            self._pending_latency[sid] = (latency_ms, current_quality)
 
-        document.getElementById('btn-fullscreen').addEventListener('click', () => {
-            if (!document.fullscreenElement) {
-                document.documentElement.requestFullscreen();
-            } else {
-                document.exitFullscreen();
-            }
-        });
-
-        document.getElementById('btn-keyboard').addEventListener('click', () => {
-            keyboardBar.classList.toggle('visible');
-        });
-
-        document.getElementById('btn-reset').addEventListener('click', () => {
-            window.location.reload();
-        });
-
-        document.querySelectorAll('.key-btn').forEach(btn => {
-            const key = btn.dataset.key;
-            
-            btn.addEventListener('touchstart', (e) => {
-                e.preventDefault();
-                if (!activeKeys.has(key)) {
-                    activeKeys.add(key);
-                    sendInput('keydown', { key });
-                    btn.style.background = 'var(--accent)';
-                }
-            });
-            
-            btn.addEventListener('touchend', (e) => {
-                e.preventDefault();
-                if (activeKeys.has(key)) {
-                    activeKeys.delete(key);
-                    sendInput('keyup', { key });
-                    btn.style.background = '';
-                }
-            });
-        });
-
-        document.addEventListener('keydown', (e) => {
-            if (!activeKeys.has(e.key)) {
-                activeKeys.add(e.key);
-                sendInput('keydown', { key: e.key });
+    def _apply_quality(self, quality: float):
+        if not self.quality_controller.is_settled():
+            return
+        if abs(quality - self._applied_quality) <= 0.05:
+            return
+        now = time.monotonic()
+        if now - self._last_quality_apply < self.quality_apply_interval:
+            return
+        self.capture_engine.set_quality(quality)
+        self._applied_quality = quality
+        self._last_quality_apply = now
+        self._connected_payload_cache = None
+
+    def _refresh_desktop_size(self):
+        width, height = self.capture_engine.get_desktop_size()
+        if self._desktop_size_list != [width, height]:
+            self._desktop_size_list = [width, height]
+            self._connected_payload_cache = None
+
+    def _get_connected_payload(self) -> Dict[str, Any]:
+        if self._connected_payload_cache is None:
+            if self._desktop_size_list is None:
+                self._refresh_desktop_size()
+            self._connected_payload_cache = {
+                "desktop_size": self._desktop_size_list,
+                "quality": self._applied_quality,
             }
-        });
+        return self._connected_payload_cache
+
+    async def _on_startup(self):
+        self.loop = asyncio.get_running_loop()
+        self.input_handler.warm_up()
+
+    def _on_frame(self, frame_data: bytes):
+        self.loop.call_soon_threadsafe(self._enqueue_frame, frame_data)
+
+    def _enqueue_frame(self, frame_data: bytes):
+        keyframe = is_keyframe(frame_data)
+        for frame_id, queue in self.client_queues.items():
+            if frame_id in self._awaiting_keyframe:
+                if not keyframe:
+                    continue
+                self._awaiting_keyframe.discard(frame_id)
+            try:
+                queue.put_nowait(frame_data)
+            except asyncio.QueueFull:
+                # Frames are deltas, so a client that falls behind is flushed
+                # and skips ahead to the next full frame on its own.
+                while not queue.empty():
+                    queue.get_nowait()
+                if keyframe:
+                    queue.put_nowait(frame_data)
+                else:
+                    self._awaiting_keyframe.add(frame_id)
+        if self._awaiting_keyframe and not keyframe:
+            self._request_keyframe()
+
+    def _request_keyframe(self):
+        if self._keyframe_retry is not None:
+            return
+        remaining = (
+            self._last_keyframe_request + self.keyframe_min_interval - time.monotonic()
+        )
+        if remaining > 0:
+            self._keyframe_retry = asyncio.get_running_loop().call_later(
+                remaining, self._send_keyframe_request
+            )
+            return
+        self._send_keyframe_request()
 
-        document.addEventListener('keyup', (e) => {
-            if (activeKeys.has(e.key)) {
-                activeKeys.delete(e.key);
-                sendInput('keyup', { key: e.key });
-            }
-        });
+    def _send_keyframe_request(self):
+        self._keyframe_retry = None
+        if not self._awaiting_keyframe:
+            return
+        self._last_keyframe_request = time.monotonic()
+        self.capture_engine.request_keyframe()
+
+    async def _ping_loop(self):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            for sid in list(self.connected_clients):
+                # Re-stamping an unanswered ping would make its late pong
+                # look faster than the link really is.
+                if sid in self.latency_tracker:
+                    continue
+                self.latency_tracker[sid] = time.monotonic_ns()
+                try:
+                    await self.sio.emit("ping", to=sid)
+                except Exception as e:
+                    self.logger.debug(f"Ping emit error for {sid}: {e}")
+
+    async def _latency_flush(self):
+        while True:
+            await asyncio.sleep(0.25)
+            if not self._pending_latency:
+                continue
+            pending, self._pending_latency = self._pending_latency, {}
+            for sid, (latency_ms, quality) in pending.items():
+                try:
+                    await self.sio.emit(
+                        "latency",
+                        {"ms": round(latency_ms, 1), "quality": quality},
+                        to=sid,
+                    )
+                except Exception as e:
+                    self.logger.debug(f"Latency emit error for {sid}: {e}")
+
+    async def _frame_sender(self, websocket: WebSocket, queue: asyncio.Queue):
+        while True:
+            frame = await queue.get()
+            try:
+                await websocket.send_bytes(frame)
+            except Exception as e:
+                self.logger.debug(f"Frame send error: {e}")
+                return
 
-        window.addEventListener('resize', reportViewport);
-        
-        connect();
-    </script>
-</body>
-</html>"""
+    def _get_html_page(self) -> str:
+        return _INDEX_HTML
 
     def run(self, host: Optional[str] = None, port: Optional[int] = None):
         import uvicorn
@@ -781,6 +453,18 @@ class OpenTouchServer:
         )
         display_connection_info(url)
 
-        uvicorn.run(
-            self.socket_app, host=actual_host, port=actual_port, log_level="warning"
+        # Capture and input are process-local, so this always runs a single
+        # worker. "auto" picks uvloop where it exists (it has no Windows build).
+        server_config = uvicorn.Config(
+            self.socket_app,
+            host=actual_host,
+            port=actual_port,
+            log_level="warning",
+            loop="auto",
+            http="httptools",
+            ws="auto",
+            access_log=False,
+            timeout_keep_alive=5,
         )
+        sock = create_server_socket(actual_host, actual_port)
+        uvicorn.Server(server_config).run(sockets=[sock])
@@ -0,0 +1,320 @@
+const canvas = document.getElementById('canvas');
+const ctx = canvas.getContext('2d', { alpha: false });
+const status = document.getElementById('status');
+const dot = document.getElementById('dot');
+const fpsCounter = document.getElementById('fps-counter');
+const latencyIndicator = document.getElementById('latency-indicator');
+const qualityBar = document.getElementById('quality-bar');
+const qualityFill = document.getElementById('quality-fill');
+const keyboardBar = document.getElementById('keyboard-bar');
+
+let socket = null;
+let frameSocket = null;
+let desktopWidth = 1920;
+let desktopHeight = 1080;
+let frameCount = 0;
+let lastFpsUpdate = Date.now();
+let currentQuality = 0.85;
+let drawQueue = Promise.resolve();
+
+let touchStartPos = null;
+let touchStartTime = 0;
+let isDragging = false;
+let longPressTimer = null;
+let isRightClick = false;
+
+let lastTwoFingerDist = null;
+let lastTwoFingerCenter = null;
+
+let canvasRect = canvas.getBoundingClientRect();
+
+let pendingMove = null;
+let moveScheduled = false;
+
+let activeKeys = new Set();
+
+function connect() {
+    socket = io(window.location.origin, {
+        transports: ['websocket']
+    });
+    
+    socket.on('connect', () => {
+        status.textContent = 'Connected';
+        dot.style.background = '#22c55e';
+        dot.style.boxShadow = '0 0 10px #22c55e';
+        qualityBar.classList.add('visible');
+        reportViewport();
+        openFrameSocket();
+    });
+    
+    socket.on('connected', (data) => {
+        desktopWidth = data.desktop_size[0];
+        desktopHeight = data.desktop_size[1];
+        currentQuality = data.quality || 0.85;
+        updateQualityDisplay();
+    });
+    
+    socket.on('ping', () => socket.emit('pong'));
+
+    socket.on('latency', (data) => {
+        latencyIndicator.textContent = `${data.ms}ms`;
+        currentQuality = data.quality;
+        updateQualityDisplay();
+    });
+    
+    socket.on('disconnect', () => {
+        status.textContent = 'Disconnected';
+        dot.style.background = '#ef4444';
+        dot.style.boxShadow = '0 0 10px #ef4444';
+        qualityBar.classList.remove('visible');
+        if (frameSocket) frameSocket.close();
+    });
+}
+
+function openFrameSocket() {
+    if (frameSocket && frameSocket.readyState <= WebSocket.OPEN) return;
+    const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+    const ws = new WebSocket(`${scheme}://${window.location.host}/ws/frame`);
+    ws.binaryType = 'arraybuffer';
+    // A replaced socket may still deliver or close late; only the current one counts.
+    ws.onmessage = (event) => {
+        if (frameSocket === ws) drawFrame(event.data);
+    };
+    ws.onclose = () => {
+        if (frameSocket !== ws) return;
+        frameSocket = null;
+        if (socket && socket.connected) setTimeout(openFrameSocket, 1000);
+    };
+    frameSocket = ws;
+}
+
+function drawFrame(buffer) {
+    // Header: frame width, frame height, then the x, y, w, h of the JPEG rect.
+    const header = new Uint16Array(buffer.slice(0, 12));
+    const decoded = createImageBitmap(new Blob([new Uint8Array(buffer, 12)], { type: 'image/jpeg' }));
+    // Rects are deltas, so decode in parallel but paint strictly in order.
+    drawQueue = drawQueue.then(async () => {
+        let bmp;
+        try {
+            bmp = await decoded;
+        } catch (err) {
+            return;
+        }
+        if (canvas.width !== header[0] || canvas.height !== header[1]) {
+            canvas.width = header[0];
+            canvas.height = header[1];
+            refreshRect();
+            reportViewport();
+        }
+        ctx.drawImage(bmp, header[2], header[3]);
+        bmp.close();
+        frameCount++;
+        updateFps();
+    });
+}
+
+function updateQualityDisplay() {
+    const percentage = currentQuality * 100;
+    qualityFill.style.width = `${percentage}%`;
+    
+    let color = '#22c55e';
+    if (currentQuality < 0.5) color = '#ef4444';
+    else if (currentQuality < 0.7) color = '#eab308';
+    else if (currentQuality < 0.85) color = '#84cc16';
+    
+    qualityFill.style.background = color;
+    latencyIndicator.style.background = `${color}33`;
+    latencyIndicator.style.color = color;
+}
+
+function updateFps() {
+    const now = Date.now();
+    if (now - lastFpsUpdate >= 1000) {
+        fpsCounter.textContent = `${frameCount} FPS`;
+        frameCount = 0;
+        lastFpsUpdate = now;
+    }
+}
+
+function reportViewport() {
+    if (socket && socket.connected) {
+        const dpr = window.devicePixelRatio || 1;
+        socket.emit('viewport', {
+            width: Math.floor(window.innerWidth * dpr),
+            height: Math.floor(window.innerHeight * dpr),
+            viewWidth: window.innerWidth,
+            viewHeight: window.innerHeight
+        });
+    }
+}
+
+function refreshRect() {
+    canvasRect = canvas.getBoundingClientRect();
+}
+
+function getTouchPos(e) {
+    const rect = canvasRect;
+    const touch = e.touches[0] || e.changedTouches[0];
+    const x = (touch.clientX - rect.left) * (canvas.width / rect.width);
+    const y = (touch.clientY - rect.top) * (canvas.height / rect.height);
+    return { x, y };
+}
+
+function sendInput(type, data) {
+    if (socket && socket.connected) {
+        socket.emit('input', { type, ...data });
+    }
+}
+
+function flushMove() {
+    moveScheduled = false;
+    if (pendingMove) {
+        sendInput('move', pendingMove);
+        pendingMove = null;
+    }
+}
+
+function queueMove(pos) {
+    pendingMove = pos;
+    if (!moveScheduled) {
+        moveScheduled = true;
+        requestAnimationFrame(flushMove);
+    }
+}
+
+canvas.addEventListener('touchstart', (e) => {
+    e.preventDefault();
+    if (e.touches.length === 1) {
+        const pos = getTouchPos(e);
+        touchStartPos = pos;
+        touchStartTime = Date.now();
+        isDragging = false;
+        isRightClick = false;
+
+        longPressTimer = setTimeout(() => {
+            isRightClick = true;
+            if (window.navigator.vibrate) window.navigator.vibrate(50);
+        }, 600);
+    } else if (e.touches.length === 2) {
+        const t1 = e.touches[0];
+        const t2 = e.touches[1];
+        lastTwoFingerCenter = {
+            x: (t1.clientX + t2.clientX) / 2,
+            y: (t1.clientY + t2.clientY) / 2
+        };
+    }
+}, { passive: false });
+
+canvas.addEventListener('touchmove', (e) => {
+    e.preventDefault();
+    if (e.touches.length === 1) {
+        const pos = getTouchPos(e);
+        const dist = Math.sqrt(Math.pow(pos.x - touchStartPos.x, 2) + Math.pow(pos.y - touchStartPos.y, 2));
+        
+        if (dist > 5) {
+            if (longPressTimer) clearTimeout(longPressTimer);
+            if (!isDragging) {
+                sendInput('mousedown', { button: 'left' });
+                isDragging = true;
+            }
+            queueMove({ x: pos.x, y: pos.y });
+        }
+    } else if (e.touches.length === 2) {
+        const t1 = e.touches[0];
+        const t2 = e.touches[1];
+        const center = {
+            x: (t1.clientX + t2.clientX) / 2,
+            y: (t1.clientY + t2.clientY) / 2
+        };
+        
+        const dy = center.y - lastTwoFingerCenter.y;
+        const dx = center.x - lastTwoFingerCenter.x;
+        
+        if (Math.abs(dy) > 2 || Math.abs(dx) > 2) {
+            sendInput('scroll', { dx: -dx, dy: dy });
+            lastTwoFingerCenter = center;
+        }
+    }
+}, { passive: false });
+
+canvas.addEventListener('touchend', (e) => {
+    e.preventDefault();
+    if (longPressTimer) clearTimeout(longPressTimer);
+
+    if (e.touches.length === 0) {
+        flushMove();
+        if (isRightClick) {
+            const pos = getTouchPos(e);
+            sendInput('move', { x: pos.x, y: pos.y });
+            sendInput('click', { button: 'right' });
+        } else if (!isDragging) {
+            const pos = getTouchPos(e);
+            sendInput('move', { x: pos.x, y: pos.y });
+            sendInput('click', { button: 'left' });
+        } else {
+            sendInput('mouseup', { button: 'left' });
+        }
+        isDragging = false;
+    }
+}, { passive: false });
+
+document.getElementById('btn-fullscreen').addEventListener('click', () => {
+    if (!document.fullscreenElement) {
+        document.documentElement.requestFullscreen();
+    } else {
+        document.exitFullscreen();
+    }
+});
+
+document.getElementById('btn-keyboard').addEventListener('click', () => {
+    keyboardBar.classList.toggle('visible');
+});
+
+document.getElementById('btn-reset').addEventListener('click', () => {
+    window.location.reload();
+});
+
+document.querySelectorAll('.key-btn').forEach(btn => {
+    const key = btn.dataset.key;
+    
+    btn.addEventListener('touchstart', (e) => {
+        e.preventDefault();
+        if (!activeKeys.has(key)) {
+            activeKeys.add(key);
+            sendInput('keydown', { key });
+            btn.style.background = 'var(--accent)';
+        }
+    });
+    
+    btn.addEventListener('touchend', (e) => {
+        e.preventDefault();
+        if (activeKeys.has(key)) {
+            activeKeys.delete(key);
+            sendInput('keyup', { key });
+            btn.style.background = '';
+        }
+    });
+});
+
+document.addEventListener('keydown', (e) => {
+    if (!activeKeys.has(e.key)) {
+        activeKeys.add(e.key);
+        sendInput('keydown', { key: e.key });
+    }
+});
+
+document.addEventListener('keyup', (e) => {
+    if (activeKeys.has(e.key)) {
+        activeKeys.delete(e.key);
+        sendInput('keyup', { key: e.key });
+    }
+});
+
+window.addEventListener('resize', () => {
+    refreshRect();
+    reportViewport();
+});
+window.addEventListener('scroll', refreshRect);
+document.addEventListener('fullscreenchange', refreshRect);
+
+connect();
@@ -0,0 +1,15 @@
+import pytest
+
+from src.config import Config
+from src.capture_engine import CaptureEngine
+from src.input_handler import InputHandler
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return CaptureEngine(Config())
+
+
+@pytest.fixture(scope="module")
+def handler():
+    return InputHandler()
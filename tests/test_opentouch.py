@@ -1,11 +1,16 @@
+import asyncio
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import AsyncMock, Mock, patch
 import numpy as np
 
 from src.config import Config
 from src.capture_engine import CaptureEngine
 from src.input_handler import InputHandler
-from src.network_utils import get_local_ip, get_available_port
+from src.network_utils import (
+    get_local_ip,
+    invalidate_local_ip_cache,
+    get_available_port,
+)
 from src.qr_display import generate_qr_terminal
 
 
@@ -33,30 +38,86 @@ class TestCaptureEngine:
         assert engine.base_jpeg_quality == 80
         assert engine.running is False
 
-    def test_get_desktop_size_fallback(self):
-        config = Config()
-        engine = CaptureEngine(config)
+    def test_get_desktop_size_cached(self, engine):
+        from src.capture_engine import _query_desktop_size_win32
 
-        import ctypes
+        _query_desktop_size_win32.cache_clear()
+        with patch("ctypes.windll", create=True) as windll:
+            windll.user32.GetSystemMetrics.side_effect = lambda idx: (2560, 1440)[idx]
 
-        user32 = ctypes.windll.user32
-        expected_width = user32.GetSystemMetrics(0)
-        expected_height = user32.GetSystemMetrics(1)
+            assert engine.get_desktop_size() == (2560, 1440)
+            assert engine.get_desktop_size() == (2560, 1440)
+            assert windll.user32.GetSystemMetrics.call_count == 2
+        _query_desktop_size_win32.cache_clear()
 
-        width, height = engine.get_desktop_size()
-        assert width == expected_width
-        assert height == expected_height
+    def test_process_frame(self, engine):
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        result = engine._process_frame(frame)
 
-    def test_process_frame(self):
-        config = Config()
-        engine = CaptureEngine(config)
+        assert result is not None
+        assert isinstance(result, bytes)
 
-        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    def test_process_frame_bgra(self, engine):
+        frame = np.zeros((720, 1280, 4), dtype=np.uint8)
         result = engine._process_frame(frame)
 
         assert result is not None
         assert isinstance(result, bytes)
 
+    def test_frame_signature(self, engine):
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        same = frame.copy()
+        changed = frame.copy()
+        changed[100, 200, 1] = 1
+
+        assert engine._frame_signature(frame) == engine._frame_signature(same)
+        assert engine._frame_signature(frame) != engine._frame_signature(changed)
+
+    def test_frames_identical_ignores_alpha(self, engine):
+        prev = np.full((72, 128, 4), 255, dtype=np.uint8)
+        prev[..., :3] = 0
+        frame = prev.copy()
+        frame[..., :3] = 6
+
+        assert not engine._frames_identical(frame, prev)
+        assert engine._frames_identical(prev.copy(), prev)
+
+    def test_dirty_rect(self, engine):
+        prev = np.zeros((720, 1280, 4), dtype=np.uint8)
+        frame = prev.copy()
+        assert engine._dirty_rect(frame, prev) is None
+
+        frame[100:150, 200:260, 2] = 255
+        frame[300, 220, 0] = 1
+        assert engine._dirty_rect(frame, prev) == (200, 100, 60, 201)
+
+    def test_encode_rect_header(self, engine):
+        from src.capture_engine import FRAME_HEADER
+
+        frame = np.zeros((720, 1280, 4), dtype=np.uint8)
+        result = engine._encode_rect(frame, (200, 100, 60, 40))
+
+        assert FRAME_HEADER.unpack_from(result) == (1280, 720, 200, 100, 60, 40)
+        assert result[FRAME_HEADER.size : FRAME_HEADER.size + 2] == b"\xff\xd8"
+
+    def test_drain_encodes_in_capture_order(self):
+        from concurrent.futures import Future
+
+        engine = CaptureEngine(Config())
+        sent = []
+        engine.frame_callback = sent.append
+        first, second = Future(), Future()
+        engine._pending_encodes.extend([first, second])
+
+        second.set_result(b"second")
+        engine._drain_encodes(engine.max_pending_encodes)
+        assert sent == []
+
+        first.set_result(b"first")
+        engine._drain_encodes(engine.max_pending_encodes)
+        assert sent == [b"first", b"second"]
+        assert engine.stats.frames_sent == 2
+
     def test_set_quality(self):
         config = Config()
         engine = CaptureEngine(config)
@@ -70,10 +131,7 @@ class TestCaptureEngine:
         engine.set_quality(0.2)
         assert engine.current_jpeg_quality == 30
 
-    def test_get_stats(self):
-        config = Config()
-        engine = CaptureEngine(config)
-
+    def test_get_stats(self, engine):
         stats = engine.get_stats()
         assert "frames_captured" in stats
         assert "frames_skipped" in stats
@@ -108,18 +166,31 @@ class TestInputHandler:
         assert 0 <= pc_x < 1920
         assert 0 <= pc_y < 1080
 
-    def test_parse_special_key(self):
-        handler = InputHandler()
+    def test_transform_coordinates_single_signature(self, handler):
+        from src.input_handler import _xform
+
+        handler.warm_up()
+        handler._transform_coordinates(640, 360.5, 1280, 720)
+        handler._transform_coordinates(640.5, 360, 1280.0, 720)
 
+        if hasattr(_xform, "signatures"):
+            assert len(_xform.signatures) == 1
+
+    def test_parse_special_key(self, handler):
         from pynput import keyboard
 
         assert handler._parse_key("Enter") == keyboard.Key.enter
         assert handler._parse_key("escape") == keyboard.Key.esc
         assert handler._parse_key("Tab") == keyboard.Key.tab
 
-    def test_parse_char_key(self):
-        handler = InputHandler()
+    def test_parse_browser_key_names(self, handler):
+        from pynput import keyboard
+
+        assert handler._parse_key("ArrowUp") == keyboard.Key.up
+        assert handler._parse_key("Control") == keyboard.Key.ctrl
+        assert handler._parse_key("PageDown") == keyboard.Key.page_down
 
+    def test_parse_char_key(self, handler):
         result = handler._parse_key("a")
         assert result is not None
 
@@ -133,11 +204,31 @@ class TestNetworkUtils:
         assert isinstance(ip, str)
         assert len(ip) > 0
 
+    def test_get_local_ip_cached(self):
+        invalidate_local_ip_cache()
+        first = get_local_ip()
+        assert get_local_ip() == first
+        assert get_local_ip.cache_info().hits >= 1
+
+        invalidate_local_ip_cache()
+        assert get_local_ip.cache_info().currsize == 0
+
     def test_get_available_port_returns_int(self):
         port = get_available_port(8000)
         assert isinstance(port, int)
-        assert port >= 8000
-        assert port < 8100
+        assert 0 < port < 65536
+
+    def test_get_available_port_falls_back_when_taken(self):
+        import socket
+
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as taken:
+            taken.bind(("", 0))
+            taken.listen(1)
+            busy_port = taken.getsockname()[1]
+
+            port = get_available_port(busy_port)
+            assert port != busy_port
+            assert 0 < port < 65536
 
 
 class TestQRDisplay:
@@ -203,6 +294,46 @@ class TestServerLifecycle:
         assert "socket.io" in html
         assert "keyboard-bar" in html
 
+    def test_index_etag_per_encoding(self):
+        from fastapi.testclient import TestClient
+        from src.server import OpenTouchServer
+
+        server = OpenTouchServer(Config())
+        with TestClient(server.app) as client:
+            gz = client.get("/", headers={"Accept-Encoding": "gzip"})
+            plain = client.get("/", headers={"Accept-Encoding": "identity"})
+            assert gz.headers["etag"] != plain.headers["etag"]
+
+            revalidate = client.get(
+                "/",
+                headers={
+                    "Accept-Encoding": "identity",
+                    "If-None-Match": f'"stale", W/{plain.headers["etag"]}',
+                },
+            )
+            assert revalidate.status_code == 304
+
+            mismatched = client.get(
+                "/",
+                headers={
+                    "Accept-Encoding": "identity",
+                    "If-None-Match": gz.headers["etag"],
+                },
+            )
+            assert mismatched.status_code == 200
+
+    def test_static_immutable_only_when_fingerprinted(self):
+        from fastapi.testclient import TestClient
+        from src.server import OpenTouchServer
+
+        server = OpenTouchServer(Config())
+        with TestClient(server.app) as client:
+            versioned = client.get("/static/app.js?v=abc123")
+            assert "immutable" in versioned.headers["cache-control"]
+
+            plain = client.get("/static/app.js")
+            assert "immutable" not in plain.headers["cache-control"]
+
     def test_quality_controller(self):
         from src.server import QualityController
 
@@ -215,3 +346,184 @@ class TestServerLifecycle:
         qc.record_latency(20)
         qc.record_latency(20)
         qc.record_latency(20)
+
+    def test_quality_controller_window_average(self):
+        from src.server import QualityController
+
+        qc = QualityController(base_quality=0.85)
+        assert qc.get_avg_latency() == 0
+
+        for _ in range(qc.max_samples):
+            qc.record_latency(300)
+        for _ in range(qc.max_samples):
+            qc.record_latency(20)
+
+        assert len(qc.latency_samples) == qc.max_samples
+        assert qc.get_avg_latency() == pytest.approx(20)
+
+    def test_quality_apply_throttled(self):
+        from src.server import OpenTouchServer
+
+        config = Config(jpeg_quality=0.85)
+        server = OpenTouchServer(config)
+
+        server._apply_quality(0.5)
+        assert server.capture_engine.current_jpeg_quality == 85
+
+        for _ in range(server.quality_controller.max_samples // 2):
+            server.quality_controller.record_latency(300)
+
+        server._apply_quality(0.5)
+        assert server.capture_engine.current_jpeg_quality == 50
+
+        server._apply_quality(0.9)
+        assert server.capture_engine.current_jpeg_quality == 50
+
+    def test_reconnect_picks_up_new_desktop_size(self):
+        from src.server import OpenTouchServer
+
+        server = OpenTouchServer(Config())
+        server.capture_engine._capture_loop = Mock()
+        server.sio.emit = AsyncMock()
+        connect = server.sio.handlers["/"]["connect"]
+        disconnect = server.sio.handlers["/"]["disconnect"]
+        size = [1920, 1080]
+
+        async def session():
+            await connect("sid", {})
+            await disconnect("sid")
+            size[:] = [2560, 1440]
+            await connect("sid", {})
+            await disconnect("sid")
+
+        with patch("src.capture_engine.dxcam"), patch(
+            "ctypes.windll", create=True
+        ) as windll:
+            windll.user32.GetSystemMetrics.side_effect = lambda idx: size[idx]
+            asyncio.run(session())
+            # One width/height query per session, shared by connect() and start().
+            assert windll.user32.GetSystemMetrics.call_count == 4
+        server.capture_engine.invalidate_desktop_size()
+
+        payload = server.sio.emit.await_args_list[-1].args[1]
+        assert payload["desktop_size"] == [2560, 1440]
+        assert server.input_handler.desktop_width == 2560
+        assert server.capture_engine.desktop_width == 2560
+        assert server.input_handler.desktop_height == 1440
+
+    def test_pong_measures_round_trip_from_ping(self):
+        import time
+        from src.server import OpenTouchServer
+
+        server = OpenTouchServer(Config())
+        pong = server.sio.handlers["/"]["pong"]
+
+        asyncio.run(pong("sid"))
+        assert len(server.quality_controller.latency_samples) == 0
+
+        server.latency_tracker["sid"] = time.monotonic_ns() - 40_000_000
+        asyncio.run(pong("sid"))
+        latency_ms = server.quality_controller.latency_samples[-1]
+        assert 40 <= latency_ms < 1000
+        assert "sid" not in server.latency_tracker
+
+        asyncio.run(pong("sid"))
+        assert len(server.quality_controller.latency_samples) == 1
+
+    def test_slow_pong_measured_from_first_ping(self):
+        from src.server import OpenTouchServer
+
+        server = OpenTouchServer(Config())
+        server.ping_interval = 0.01
+        server.sio.emit = AsyncMock()
+        server.connected_clients["sid"] = {}
+        pong = server.sio.handlers["/"]["pong"]
+
+        async def slow_round_trip():
+            pinger = asyncio.create_task(server._ping_loop())
+            await asyncio.sleep(0.015)
+            first_ping = server.latency_tracker["sid"]
+            await asyncio.sleep(0.05)
+            assert server.latency_tracker["sid"] == first_ping
+            await pong("sid")
+            pinger.cancel()
+
+        asyncio.run(slow_round_trip())
+        assert server.quality_controller.latency_samples[-1] >= 50
+
+    def test_frame_websocket_delivers_frames(self):
+        from fastapi.testclient import TestClient
+        from src.server import OpenTouchServer
+
+        from src.capture_engine import FRAME_HEADER
+
+        keyframe = FRAME_HEADER.pack(1280, 720, 0, 0, 1280, 720) + b"\xff\xd8frame"
+        server = OpenTouchServer(Config())
+        with TestClient(server.app) as client:
+            with client.websocket_connect("/ws/frame") as ws:
+                ws.portal.call(server._enqueue_frame, keyframe)
+                assert ws.receive_bytes() == keyframe
+
+    def test_slow_frame_client_resyncs_alone(self):
+        from src.capture_engine import FRAME_HEADER
+        from src.server import OpenTouchServer
+
+        def frame(x, y, w, h):
+            return FRAME_HEADER.pack(1280, 720, x, y, w, h) + b"\xff\xd8"
+
+        keyframe = frame(0, 0, 1280, 720)
+        server = OpenTouchServer(Config())
+        server.keyframe_min_interval = 0.02
+        server.capture_engine.request_keyframe = Mock()
+        slow = asyncio.Queue(maxsize=2)
+        fast = asyncio.Queue(maxsize=2)
+        server.client_queues = {"slow": slow, "fast": fast}
+
+        async def stream():
+            for i in range(4):
+                server._enqueue_frame(frame(i, 0, 10, 10))
+                assert fast.get_nowait() == frame(i, 0, 10, 10)
+            assert slow.empty()
+            assert server._awaiting_keyframe == {"slow"}
+            assert server.capture_engine.request_keyframe.call_count == 1
+
+            server._enqueue_frame(keyframe)
+            assert slow.get_nowait() == keyframe
+            assert not server._awaiting_keyframe
+
+            await asyncio.sleep(0.05)
+            assert server.capture_engine.request_keyframe.call_count == 1
+
+        asyncio.run(stream())
+
+    def test_frame_socket_joining_after_keyframe_gets_one(self):
+        import time
+        from fastapi.testclient import TestClient
+        from src.server import OpenTouchServer
+
+        server = OpenTouchServer(Config())
+        server.keyframe_min_interval = 0.05
+        server.capture_engine.request_keyframe = Mock()
+        with TestClient(server.app) as client:
+            with client.websocket_connect("/ws/frame"):
+                with client.websocket_connect("/ws/frame"):
+                    assert server.capture_engine.request_keyframe.call_count == 1
+                    time.sleep(0.15)
+                    assert server.capture_engine.request_keyframe.call_count == 2
+
+    def test_frame_sender_single_write_per_frame(self):
+        from src.server import OpenTouchServer
+
+        server = OpenTouchServer(Config())
+        websocket = Mock()
+        websocket.send_bytes = AsyncMock()
+
+        async def drain():
+            queue = asyncio.Queue()
+            queue.put_nowait(b"\xff\xd8frame")
+            sender = asyncio.create_task(server._frame_sender(websocket, queue))
+            await asyncio.sleep(0)
+            sender.cancel()
+
+        asyncio.run(drain())
+        websocket.send_bytes.assert_awaited_once_with(b"\xff\xd8frame")